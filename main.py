@@ -1,20 +1,26 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header
-from pydantic import BaseModel, HttpUrl
-from typing import List, Annotated
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, status
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+from typing import List, Annotated, Literal
 import os
 import tempfile
 import shutil
-import uuid
 import logging
 import aiohttp
+import orjson
 import secrets
 import base64
 import hashlib
-from datetime import datetime
+import hmac
+import time
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from dotenv import load_dotenv
 
 from video_merger import VideoMerger
-from s3_client import S3Client
+from s3_client import S3Client, DOWNLOAD_TIMEOUT
 from youtube_uploader import YouTubeUploader
 
 # Load environment variables
@@ -28,10 +34,39 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create shared resources on startup and release them on shutdown."""
+    # One pooled session for all outbound HTTP calls so keep-alive
+    # connections are reused instead of re-handshaking per request
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=16,
+            keepalive_timeout=75,
+            ttl_dns_cache=600,
+            # Abort TLS transports left half-closed by peers instead of leaking them
+            enable_cleanup_closed=True,
+        ),
+        # Downloads may run far longer than aiohttp's default 5 minute deadline
+        timeout=DOWNLOAD_TIMEOUT,
+    )
+    s3_client.http_session = app.state.http
+    youtube_uploader.http_session = app.state.http
+    try:
+        yield
+    finally:
+        await youtube_uploader.close()
+        await app.state.http.close()
+
+
 app = FastAPI(
     title="Video Merger API",
     description="API for merging videos from MinIO S3 buckets",
     version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 
@@ -44,19 +79,19 @@ def generate_api_key() -> str:
     return api_key
 
 
-def get_api_key_hash() -> str:
-    """Get the expected API key hash from environment."""
+def get_api_key_hash() -> bytes:
+    """Get the expected API key SHA-256 digest from environment."""
     api_key = os.getenv("API_KEY")
     if not api_key:
         # Generate a new API key if none exists
         new_key = generate_api_key()
-        logger.warning(f"No API_KEY found in environment. Generated new key: {new_key}")
+        logger.warning("No API_KEY found in environment. Generated new key: %s", new_key)
         logger.warning(
             "Please set API_KEY environment variable with this key for production use."
         )
-        return hashlib.sha256(new_key.encode()).hexdigest()
+        return hashlib.sha256(new_key.encode()).digest()
 
-    return hashlib.sha256(api_key.encode()).hexdigest()
+    return hashlib.sha256(api_key.encode()).digest()
 
 
 def verify_api_key(x_api_key: Annotated[str, Header()]) -> bool:
@@ -67,11 +102,10 @@ def verify_api_key(x_api_key: Annotated[str, Header()]) -> bool:
             detail="API key is required. Provide it in the 'X-API-Key' header.",
         )
 
-    # Hash the provided key and compare
-    provided_hash = hashlib.sha256(x_api_key.encode()).hexdigest()
-    expected_hash = get_api_key_hash()
+    # Hash the provided key and compare against the digest computed at startup
+    provided_hash = hashlib.sha256(x_api_key.encode()).digest()
 
-    if provided_hash != expected_hash:
+    if not hmac.compare_digest(provided_hash, expected_api_key_hash):
         raise HTTPException(status_code=401, detail="Invalid API key.")
 
     return True
@@ -82,8 +116,36 @@ expected_api_key_hash = get_api_key_hash()
 
 
 class VideoMergeRequest(BaseModel):
-    video_urls: List[HttpUrl]
+    video_urls: Annotated[List[str], Field(min_length=2, max_length=50)]
     output_filename: str | None = None
+    # When set, the merge runs in the background and the result is POSTed here
+    callback_url: str | None = None
+
+    @field_validator("video_urls")
+    @classmethod
+    def validate_video_urls(cls, video_urls: List[str]) -> List[str]:
+        """Only HTTP(S) URLs can be downloaded."""
+        for url in video_urls:
+            if not url.startswith(("http://", "https://")):
+                raise ValueError(f"Video URL must start with http:// or https://: {url}")
+        return video_urls
+
+    @field_validator("output_filename")
+    @classmethod
+    def validate_output_filename(cls, output_filename: str | None) -> str | None:
+        """The output filename is used as a file name and object key, never a path."""
+        if output_filename is None:
+            return output_filename
+        if (
+            not output_filename.strip()
+            or output_filename.startswith(".")
+            or any(c in output_filename for c in ("/", "\\", "\0"))
+        ):
+            raise ValueError(
+                "Output filename must be a plain file name without path "
+                f"separators or a leading dot: {output_filename!r}"
+            )
+        return output_filename
 
 
 class VideoMergeResponse(BaseModel):
@@ -92,15 +154,32 @@ class VideoMergeResponse(BaseModel):
     processing_time_seconds: float
 
 
+class VideoMergeJobResponse(BaseModel):
+    job_id: str
+    status: str
+
+
 class YouTubeUploadRequest(BaseModel):
     video_url: HttpUrl
-    title: str
-    description: str
+    title: str = Field(max_length=100)  # YouTube limit
+    description: str = Field(max_length=5000)  # YouTube limit
     tags: List[str]
     categoryId: str = "22"  # Default: People & Blogs
-    privacyStatus: str = "public"  # public | unlisted | private
+    privacyStatus: Literal["public", "unlisted", "private"] = "public"
     callback_url: str | None = None
 
+    @field_validator("tags")
+    @classmethod
+    def validate_tags_length(cls, tags: List[str]) -> List[str]:
+        """YouTube allows up to 500 characters across all tags."""
+        if sum(map(len, tags)) > 500:
+            raise ValueError("Total length of all tags must be 500 characters or less")
+        return tags
+
+
+class YouTubeBatchUploadRequest(BaseModel):
+    videos: Annotated[List[YouTubeUploadRequest], Field(min_length=1, max_length=50)]
+
 
 class YouTubeUploadResponse(BaseModel):
     success: bool
@@ -116,6 +195,18 @@ s3_client = S3Client()
 video_merger = VideoMerger()
 youtube_uploader = YouTubeUploader()
 
+# Limit how many source videos are downloaded at the same time
+download_semaphore = asyncio.Semaphore(int(os.getenv("DOWNLOAD_CONCURRENCY", "5")))
+
+# Limit concurrent CPU-heavy merges and YouTube uploads so workers aren't oversubscribed
+merge_semaphore = asyncio.Semaphore(
+    int(os.getenv("MERGE_CONCURRENCY", str(max(1, (os.cpu_count() or 2) // 2))))
+)
+upload_semaphore = asyncio.Semaphore(int(os.getenv("UPLOAD_CONCURRENCY", "2")))
+
+# Pipe compatible merges straight into the bucket as fragmented MP4 instead of via a temp file
+stream_merged_upload = os.getenv("STREAM_MERGED_UPLOAD", "false").lower() == "true"
+
 
 @app.get("/")
 async def root():
@@ -124,7 +215,7 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
 # @app.post("/generate-api-key")
@@ -147,91 +238,138 @@ async def health_check():
 #     }
 
 
-@app.post("/merge-videos", response_model=VideoMergeResponse)
+@app.post(
+    "/merge-videos",
+    response_model=VideoMergeResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": VideoMergeJobResponse}},
+)
 async def merge_videos(
-    request: VideoMergeRequest, api_key_valid: bool = Depends(verify_api_key)
+    request: VideoMergeRequest,
+    background_tasks: BackgroundTasks,
+    api_key_valid: bool = Depends(verify_api_key),
 ):
     """
     Merge multiple videos from URLs into a single MP4 file.
 
+    With a callback_url the merge is queued and 202 is returned immediately;
+    the result is POSTed to the callback URL when it finishes.
+
     Args:
         request: VideoMergeRequest containing list of video URLs
 
     Returns:
-        VideoMergeResponse with the URL of the merged video
+        VideoMergeResponse with the URL of the merged video, or
+        VideoMergeJobResponse with the job ID for a queued merge
     """
-    start_time = datetime.utcnow()
-    temp_dir = None
+    if request.callback_url:
+        job_id = uuid.uuid4().hex
+        background_tasks.add_task(_merge_job, job_id, request)
+        logger.info("Queued merge job %s", job_id)
+        return ORJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=VideoMergeJobResponse(job_id=job_id, status="queued").model_dump(),
+        )
 
+    return await _merge(request)
+
+
+async def _merge_job(job_id: str, request: VideoMergeRequest):
+    """Run a queued merge and report its outcome to the request's callback URL."""
     try:
-        logger.info(
-            f"Starting video merge process for {len(request.video_urls)} videos"
-        )
+        result = await _merge(request)
+        callback_data = {"job_id": job_id, "status": "completed", **result.model_dump()}
+    except HTTPException as e:
+        callback_data = {"job_id": job_id, "status": "failed", "error": e.detail}
 
-        # Validate input
-        if not request.video_urls:
-            raise HTTPException(status_code=400, detail="No video URLs provided")
+    await _send_callback(request.callback_url, callback_data)
 
-        if len(request.video_urls) < 2:
-            raise HTTPException(
-                status_code=400, detail="At least 2 videos are required for merging"
-            )
+
+async def _merge(request: VideoMergeRequest) -> VideoMergeResponse:
+    """Download, merge and upload the requested videos."""
+    start_time = time.perf_counter()
+    temp_dir = None
+    staged_path = None
+
+    try:
+        video_count = len(request.video_urls)
+        logger.info("Starting video merge process for %d videos", video_count)
 
         # Create temporary directory
-        temp_dir = tempfile.mkdtemp(prefix="video_merge_")
-        logger.info(f"Created temporary directory: {temp_dir}")
+        temp_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="video_merge_")
+        logger.info("Created temporary directory: %s", temp_dir)
 
-        # Download videos
+        # Download videos concurrently, bounded by the download semaphore
         logger.info("Downloading videos...")
-        downloaded_files = []
-        for i, url in enumerate(request.video_urls):
-            try:
-                file_path = await s3_client.download_video(
-                    str(url), temp_dir, f"video_{i}.mp4"
-                )
-                downloaded_files.append(file_path)
-                logger.info(f"Downloaded video {i + 1}/{len(request.video_urls)}")
-            except Exception as e:
-                logger.error(f"Failed to download video from {url}: {str(e)}")
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Failed to download video from {url}: {str(e)}",
-                )
+
+        async def _download(i: int, url: str) -> str:
+            async with download_semaphore:
+                try:
+                    file_path = await s3_client.download_video(
+                        url, temp_dir, f"video_{i}.mp4"
+                    )
+                except Exception as e:
+                    logger.error("Failed to download video from %s: %s", url, e)
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"Failed to download video from {url}: {str(e)}",
+                    )
+                logger.info("Downloaded video %d/%d", i + 1, video_count)
+                return file_path
+
+        tasks = [
+            asyncio.create_task(_download(i, url))
+            for i, url in enumerate(request.video_urls)
+        ]
+        try:
+            downloaded_files = await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the remaining downloads before the temp directory is removed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
         # Generate output filename
         if not request.output_filename:
-            output_filename = f"merged_video_{uuid.uuid4().hex[:8]}_{int(datetime.utcnow().timestamp())}.mp4"
+            output_filename = (
+                f"merged_video_{secrets.token_hex(4)}_{time.time_ns() // 1_000_000_000}.mp4"
+            )
         else:
             output_filename = request.output_filename
             if not output_filename.endswith(".mp4"):
                 output_filename += ".mp4"
 
-        # Merge videos
-        logger.info("Merging videos...")
-        merged_video_path = os.path.join(temp_dir, output_filename)
-        await video_merger.merge_videos(downloaded_files, merged_video_path)
-        logger.info("Videos merged successfully")
-
-        # Upload merged video
-        logger.info("Uploading merged video...")
-        merged_video_url = await s3_client.upload_video(
-            merged_video_path, output_filename
-        )
-        logger.info(f"Merged video uploaded: {merged_video_url}")
-
-        # Clean up downloaded files
-        for file in downloaded_files:
-            try:
-                os.remove(file)
-                logger.info(f"Removed temporary file: {file}")
-            except Exception as e:
-                logger.warning(f"Failed to remove temporary file {file}: {str(e)}")
+        # Write straight into the bucket directory when it is on local disk
+        staged_path = s3_client.local_staging_path(output_filename)
+        merged_video_path = staged_path or os.path.join(temp_dir, output_filename)
+
+        if stream_merged_upload and not s3_client.local_bucket_path:
+            # Upload while FFmpeg is still producing the merged video
+            logger.info("Merging and streaming merged video to storage...")
+            async with merge_semaphore:
+                merged_video_url = await video_merger.merge_videos_streaming(
+                    downloaded_files,
+                    merged_video_path,
+                    lambda stream: s3_client.upload_stream(stream, output_filename),
+                )
+        else:
+            # Merge videos
+            logger.info("Merging videos...")
+            async with merge_semaphore:
+                await video_merger.merge_videos(downloaded_files, merged_video_path)
+            logger.info("Videos merged successfully")
+
+            # Upload merged video
+            logger.info("Uploading merged video...")
+            merged_video_url = await s3_client.upload_video(
+                merged_video_path, output_filename
+            )
+        logger.info("Merged video uploaded: %s", merged_video_url)
 
         # Calculate processing time
-        end_time = datetime.utcnow()
-        processing_time = (end_time - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
 
-        logger.info(f"Video merge process completed in {processing_time:.2f} seconds")
+        logger.info("Video merge process completed in %.2f seconds", processing_time)
 
         return VideoMergeResponse(
             merged_video_url=merged_video_url,
@@ -242,24 +380,47 @@ async def merge_videos(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during video merge: {str(e)}")
+        logger.error("Unexpected error during video merge: %s", e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
     finally:
-        # Clean up temporary files
-        if temp_dir and os.path.exists(temp_dir):
+        # Remove a staged output that never made it into the bucket
+        if staged_path:
             try:
-                shutil.rmtree(temp_dir)
-                logger.info(f"Cleaned up temporary directory: {temp_dir}")
+                await asyncio.to_thread(os.remove, staged_path)
+            except FileNotFoundError:
+                pass
             except Exception as e:
-                logger.warning(
-                    f"Failed to clean up temporary directory {temp_dir}: {str(e)}"
-                )
+                logger.warning("Failed to remove staged video %s: %s", staged_path, e)
+
+        # Clean up temporary files (downloads and local merge output)
+        if temp_dir:
+            await asyncio.to_thread(shutil.rmtree, temp_dir, ignore_errors=True)
+            logger.info("Cleaned up temporary directory: %s", temp_dir)
+
+
+async def _send_callback(callback_url: str, callback_data: dict):
+    """POST a job result to the client's callback URL."""
+    try:
+        async with app.state.http.post(
+            callback_url,
+            data=orjson.dumps(callback_data),
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=30),
+        ) as response:
+            if response.status == 200:
+                logger.info("Callback sent successfully to %s", callback_url)
+            else:
+                logger.warning("Callback failed with status %s", response.status)
+    except Exception as e:
+        logger.warning("Failed to send callback: %s", e)
 
 
 @app.post("/upload/youtube", response_model=YouTubeUploadResponse)
 async def upload_to_youtube(
-    request: YouTubeUploadRequest, api_key_valid: bool = Depends(verify_api_key)
+    request: YouTubeUploadRequest,
+    background_tasks: BackgroundTasks,
+    api_key_valid: bool = Depends(verify_api_key),
 ):
     """
     Download video from URL and upload to YouTube.
@@ -270,85 +431,87 @@ async def upload_to_youtube(
     Returns:
         YouTubeUploadResponse with upload result
     """
-    start_time = datetime.utcnow()
+    return await _upload_to_youtube(request, background_tasks)
 
-    try:
-        logger.info(f"Starting YouTube upload for video: {request.title}")
-        logger.info(f"Video URL: {request.video_url}")
-
-        # Validate privacy status
-        valid_privacy_statuses = ["public", "unlisted", "private"]
-        if request.privacyStatus not in valid_privacy_statuses:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid privacy status. Must be one of: {valid_privacy_statuses}",
-            )
 
-        # Validate title length (YouTube limit is 100 characters)
-        if len(request.title) > 100:
-            raise HTTPException(
-                status_code=400, detail="Title must be 100 characters or less"
-            )
+@app.post("/upload/youtube/batch", response_model=List[YouTubeUploadResponse])
+async def upload_batch_to_youtube(
+    request: YouTubeBatchUploadRequest,
+    background_tasks: BackgroundTasks,
+    api_key_valid: bool = Depends(verify_api_key),
+):
+    """
+    Upload several videos to YouTube concurrently.
 
-        # Validate description length (YouTube limit is 5000 characters)
-        if len(request.description) > 5000:
-            raise HTTPException(
-                status_code=400, detail="Description must be 5000 characters or less"
-            )
+    The upload semaphore bounds how many videos are sent to YouTube at
+    once; a failed video is reported in its own entry of the response.
 
-        # Validate tags (YouTube allows up to 500 characters total)
-        total_tags_length = sum(len(tag) for tag in request.tags)
-        if total_tags_length > 500:
-            raise HTTPException(
-                status_code=400,
-                detail="Total length of all tags must be 500 characters or less",
-            )
+    Args:
+        request: YouTubeBatchUploadRequest containing the videos to upload
+
+    Returns:
+        List of YouTubeUploadResponse in the order of the request
+    """
+    return await asyncio.gather(
+        *(_upload_to_youtube(video, background_tasks) for video in request.videos)
+    )
+
+
+async def _upload_to_youtube(
+    request: YouTubeUploadRequest, background_tasks: BackgroundTasks
+) -> YouTubeUploadResponse:
+    """Upload one video to YouTube, scheduling its callback on success."""
+    start_time = time.perf_counter()
+
+    try:
+        logger.info("Starting YouTube upload for video: %s", request.title)
+        logger.info("Video URL: %s", request.video_url)
+
+        # Videos merged into a local bucket directory can be uploaded in place
+        local_video_path = s3_client.local_object_path(str(request.video_url))
 
         # Upload video to YouTube
-        result = await youtube_uploader.upload_video_from_url(
-            video_url=str(request.video_url),
-            title=request.title,
-            description=request.description,
-            tags=request.tags,
-            category_id=request.categoryId,
-            privacy_status=request.privacyStatus,
-        )
+        async with upload_semaphore:
+            if local_video_path:
+                logger.info("Uploading from local bucket file: %s", local_video_path)
+                result = await youtube_uploader.upload_video_async(
+                    local_video_path,
+                    request.title,
+                    request.description,
+                    request.tags,
+                    request.categoryId,
+                    request.privacyStatus,
+                )
+            else:
+                result = await youtube_uploader.upload_video_from_url(
+                    video_url=str(request.video_url),
+                    title=request.title,
+                    description=request.description,
+                    tags=request.tags,
+                    category_id=request.categoryId,
+                    privacy_status=request.privacyStatus,
+                    chunk_size=1 << 20,
+                )
 
         # Calculate processing time
-        end_time = datetime.utcnow()
-        processing_time = (end_time - start_time).total_seconds()
+        processing_time = time.perf_counter() - start_time
 
         logger.info(
-            f"YouTube upload process completed in {processing_time:.2f} seconds"
+            "YouTube upload process completed in %.2f seconds", processing_time
         )
 
-        # Send callback if provided
+        # Send callback after the response has been returned
         if request.callback_url and result.get("success"):
-            try:
-                callback_data = {
-                    "video_id": result.get("video_id"),
-                    "video_url": result.get("video_url"),
-                    "status": result.get("status"),
-                    "processing_time_seconds": processing_time,
-                    "title": request.title,
-                }
-
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        request.callback_url,
-                        json=callback_data,
-                        timeout=aiohttp.ClientTimeout(total=30),
-                    ) as response:
-                        if response.status == 200:
-                            logger.info(
-                                f"Callback sent successfully to {request.callback_url}"
-                            )
-                        else:
-                            logger.warning(
-                                f"Callback failed with status {response.status}"
-                            )
-            except Exception as e:
-                logger.warning(f"Failed to send callback: {str(e)}")
+            callback_data = {
+                "video_id": result.get("video_id"),
+                "video_url": result.get("video_url"),
+                "status": result.get("status"),
+                "processing_time_seconds": processing_time,
+                "title": request.title,
+            }
+            background_tasks.add_task(
+                _send_callback, request.callback_url, callback_data
+            )
 
         # Return response
         if result.get("success"):
@@ -370,7 +533,7 @@ async def upload_to_youtube(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error during YouTube upload: {str(e)}")
+        logger.error("Unexpected error during YouTube upload: %s", e)
         return YouTubeUploadResponse(
             success=False,
             status="error",
@@ -382,4 +545,13 @@ async def upload_to_youtube(
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvicorn picks uvloop and httptools itself when they are installed.
+    # Multiple workers need an import string, which re-imports this module in
+    # each worker; a single worker serves this already-initialized app.
+    workers = int(os.getenv("WORKERS", "1"))
+    uvicorn.run(
+        "main:app" if workers > 1 else app,
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+    )
@@ -1,16 +1,58 @@
 import os
+import errno
+import contextlib
+import hmac
+import secrets
+import shutil
+import asyncio
+import aiohttp
+import aiofiles
 import boto3
-import requests
+from boto3.s3.transfer import TransferConfig
 from minio import Minio
 from minio.error import S3Error
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
 import logging
-from typing import Optional
-from urllib.parse import urlparse
-from datetime import timedelta
+from typing import BinaryIO, Optional
+from urllib.parse import parse_qsl, unquote, urlparse
+from datetime import datetime, timedelta, timezone
 
 logger = logging.getLogger(__name__)
 
+# Multipart upload tuning: parts are sent in parallel, and roughly
+# (concurrency + 1) parts are held in memory per upload
+MULTIPART_PART_SIZE = 16 * 1024 * 1024
+MULTIPART_CONCURRENCY = 8
+
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_PART_SIZE,
+    multipart_chunksize=MULTIPART_PART_SIZE,
+    max_concurrency=MULTIPART_CONCURRENCY,
+    use_threads=True
+)
+
+# HTTP downloads have no overall deadline, so multi-GB videos can finish, but
+# fail fast on a slow connect or a server that stops sending
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=10, sock_read=60)
+
+def fast_copy(src: str, dst: str):
+    """
+    Copy a file inside the kernel with copy_file_range.
+
+    Falls back to shutil.copyfile (sendfile on Linux) where copy_file_range is
+    unavailable or refuses the pair of files, e.g. across filesystems.
+    """
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+    except (AttributeError, OSError):
+        shutil.copyfile(src, dst)
+
 class S3Client:
     def __init__(self):
         """Initialize S3 client with MinIO or AWS S3 configuration."""
@@ -18,16 +60,34 @@ class S3Client:
         self.minio_access_key = os.getenv("MINIO_ACCESS_KEY")
         self.minio_secret_key = os.getenv("MINIO_SECRET_KEY")
         self.minio_secure = os.getenv("MINIO_SECURE", "false").lower() == "true"
+        self.aws_region = os.getenv("AWS_REGION", "us-east-1")
         
         self.source_bucket = os.getenv("SOURCE_BUCKET", "source-videos")
         self.target_bucket = os.getenv("TARGET_BUCKET", "merged-videos")
         
+        # Directory backing the target bucket when MinIO stores objects on local
+        # disk; only used once MinIO is seen serving a file written there
+        self._configured_local_bucket_path = os.getenv("S3_LOCAL_PATH")
+        self.local_bucket_path: Optional[str] = None
+        
+        # Derived once so per-request URL checks and uploads don't recompute them
+        self._minio_host = (self.minio_endpoint or '').split(':')[0]
+        self._public_url_template = f"https://{self.target_bucket}.s3.{self.aws_region}.amazonaws.com/{{key}}"
+        
+        # Shared aiohttp session, assigned by the application on startup
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        
         # Initialize clients
         self._init_minio_client()
         self._init_boto3_client()
         
-        # Ensure target bucket exists
-        self._ensure_bucket_exists(self.target_bucket)
+        # Ensure target bucket exists; uploads only re-check if this failed
+        self._target_bucket_ready = self._ensure_bucket_exists(self.target_bucket)
+        if self._target_bucket_ready:
+            self._enable_local_bucket_path()
+        
+        # Pay for credential resolution and the first connection now, not on the first request
+        self._warm_up_boto3_client()
     
     def _init_minio_client(self):
         """Initialize MinIO client."""
@@ -52,14 +112,13 @@ class S3Client:
         try:
             aws_access_key = os.getenv("AWS_ACCESS_KEY_ID")
             aws_secret_key = os.getenv("AWS_SECRET_ACCESS_KEY")
-            aws_region = os.getenv("AWS_REGION", "us-east-1")
             
             if aws_access_key and aws_secret_key:
                 self.boto3_client = boto3.client(
                     's3',
                     aws_access_key_id=aws_access_key,
                     aws_secret_access_key=aws_secret_key,
-                    region_name=aws_region
+                    region_name=self.aws_region
                 )
                 logger.info("Boto3 S3 client initialized")
             else:
@@ -69,8 +128,8 @@ class S3Client:
             logger.error(f"Failed to initialize boto3 client: {str(e)}")
             self.boto3_client = None
     
-    def _ensure_bucket_exists(self, bucket_name: str):
-        """Ensure the bucket exists, create if it doesn't."""
+    def _ensure_bucket_exists(self, bucket_name: str) -> bool:
+        """Ensure the bucket exists, create if it doesn't. Returns False if that failed."""
         try:
             if self.minio_client:
                 if not self.minio_client.bucket_exists(bucket_name):
@@ -78,8 +137,68 @@ class S3Client:
                     logger.info(f"Created bucket: {bucket_name}")
                 else:
                     logger.info(f"Bucket exists: {bucket_name}")
+            return True
         except S3Error as e:
             logger.error(f"Error ensuring bucket exists: {str(e)}")
+            return False
+    
+    async def _ensure_target_bucket(self):
+        """Retry the startup bucket check if it failed, e.g. because MinIO wasn't up yet."""
+        if not self._target_bucket_ready:
+            self._target_bucket_ready = await asyncio.to_thread(
+                self._ensure_bucket_exists, self.target_bucket
+            )
+            if self._target_bucket_ready:
+                await asyncio.to_thread(self._enable_local_bucket_path)
+    
+    def _enable_local_bucket_path(self):
+        """
+        Use S3_LOCAL_PATH only if MinIO serves a file written into it as an object.
+        
+        That holds only for MinIO's legacy filesystem mode; current releases
+        keep their own on-disk format, where files placed in the bucket
+        directory are not objects and would be presigned as 404s.
+        """
+        path = self._configured_local_bucket_path
+        if not (path and self.minio_client):
+            return
+        
+        probe_name = f"local-path-check-{secrets.token_hex(8)}.tmp"
+        probe_path = os.path.join(path, probe_name)
+        try:
+            with open(probe_path, 'wb') as f:
+                f.write(probe_name.encode())
+            response = self.minio_client.get_object(self.target_bucket, probe_name)
+            try:
+                served = response.read() == probe_name.encode()
+            finally:
+                response.close()
+                response.release_conn()
+        except Exception as e:
+            logger.debug(f"Local bucket path check failed: {str(e)}")
+            served = False
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(probe_path)
+        
+        if served:
+            self.local_bucket_path = path
+            logger.info(f"Writing merged videos directly to bucket directory: {path}")
+        else:
+            logger.warning(
+                f"S3_LOCAL_PATH {path} is not served by MinIO as bucket "
+                f"{self.target_bucket} (it requires a legacy filesystem-mode "
+                "deployment); uploading through the MinIO API instead"
+            )
+    
+    def _warm_up_boto3_client(self):
+        """Resolve AWS credentials and open a pooled connection with a cheap request."""
+        if not self.boto3_client:
+            return
+        try:
+            self.boto3_client.head_bucket(Bucket=self.target_bucket)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"AWS S3 warm-up request failed: {str(e)}")
     
     async def download_video(self, url: str, temp_dir: str, filename: str) -> str:
         """
@@ -107,24 +226,28 @@ class S3Client:
                 await self._download_from_http(url, file_path)
             
             # Verify file was downloaded and has content
-            if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-                raise Exception(f"Downloaded file is empty or doesn't exist: {file_path}")
+            try:
+                file_size = os.path.getsize(file_path)
+            except OSError:
+                raise Exception(f"Downloaded file doesn't exist: {file_path}")
+            if file_size == 0:
+                raise Exception(f"Downloaded file is empty: {file_path}")
             
             logger.info(f"Successfully downloaded video to: {file_path}")
             return file_path
             
         except Exception as e:
             logger.error(f"Failed to download video from {url}: {str(e)}")
-            # Clean up partial download
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            # Clean up partial download, if one was created
+            with contextlib.suppress(FileNotFoundError):
+                await asyncio.to_thread(os.remove, file_path)
             raise
     
     def _is_s3_url(self, url: str) -> bool:
         """Check if URL is an S3 URL."""
         parsed = urlparse(url)
         return parsed.hostname and ('amazonaws.com' in parsed.hostname or 
-                                  parsed.hostname == self.minio_endpoint.split(':')[0])
+                                  parsed.hostname == self._minio_host)
     
     async def _download_from_s3(self, url: str, file_path: str):
         """Download file from S3."""
@@ -138,7 +261,7 @@ class S3Client:
             key = '/'.join(path_parts[1:])
             
             if self.boto3_client:
-                self.boto3_client.download_file(bucket, key, file_path)
+                await asyncio.to_thread(self.boto3_client.download_file, bucket, key, file_path)
             else:
                 raise Exception("AWS S3 client not configured")
         else:
@@ -148,19 +271,32 @@ class S3Client:
             key = '/'.join(path_parts[1:])
             
             if self.minio_client:
-                self.minio_client.fget_object(bucket, key, file_path)
+                await asyncio.to_thread(self.minio_client.fget_object, bucket, key, file_path)
             else:
                 raise Exception("MinIO client not configured")
     
     async def _download_from_http(self, url: str, file_path: str):
-        """Download file from direct HTTP URL."""
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(file_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    f.write(chunk)
+        """
+        Download file from direct HTTP URL.
+        
+        The download has no overall deadline, so large videos can take as long
+        as they need, but it fails if connecting takes over 10 seconds or the
+        server sends nothing for a minute.
+        """
+        if self.http_session is not None:
+            await self._stream_to_file(self.http_session, url, file_path)
+        else:
+            async with aiohttp.ClientSession(timeout=DOWNLOAD_TIMEOUT) as session:
+                await self._stream_to_file(session, url, file_path)
+    
+    async def _stream_to_file(self, session: aiohttp.ClientSession, url: str, file_path: str):
+        """Stream the response body to disk in 1 MiB chunks."""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            
+            async with aiofiles.open(file_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(1 << 20):
+                    await f.write(chunk)
     
     async def upload_video(self, file_path: str, object_name: str) -> str:
         """
@@ -174,13 +310,31 @@ class S3Client:
             URL of the uploaded video
         """
         try:
-            if self.minio_client:
+            await self._ensure_target_bucket()
+            
+            if self.minio_client and self.local_bucket_path:
+                # Move the file straight into MinIO's bucket directory
+                await asyncio.to_thread(self._move_to_local_bucket, file_path, object_name)
+                
+                url = self.minio_client.presigned_get_object(
+                    self.target_bucket,
+                    object_name,
+                    expires=timedelta(days=7)  # URL valid for 7 days
+                )
+                
+                logger.info(f"Video moved into local MinIO bucket: {object_name}")
+                return url
+                
+            elif self.minio_client:
                 # Upload to MinIO
-                self.minio_client.fput_object(
+                await asyncio.to_thread(
+                    self.minio_client.fput_object,
                     self.target_bucket,
                     object_name,
                     file_path,
-                    content_type='video/mp4'
+                    content_type='video/mp4',
+                    part_size=MULTIPART_PART_SIZE,
+                    num_parallel_uploads=MULTIPART_CONCURRENCY
                 )
                 
                 # Generate presigned URL for access
@@ -195,16 +349,17 @@ class S3Client:
                 
             elif self.boto3_client:
                 # Upload to AWS S3
-                self.boto3_client.upload_file(
+                await asyncio.to_thread(
+                    self.boto3_client.upload_file,
                     file_path,
                     self.target_bucket,
                     object_name,
-                    ExtraArgs={'ContentType': 'video/mp4'}
+                    ExtraArgs={'ContentType': 'video/mp4'},
+                    Config=TRANSFER_CONFIG
                 )
                 
                 # Generate public URL
-                aws_region = os.getenv("AWS_REGION", "us-east-1")
-                url = f"https://{self.target_bucket}.s3.{aws_region}.amazonaws.com/{object_name}"
+                url = self._public_url_template.format(key=object_name)
                 
                 logger.info(f"Video uploaded to AWS S3: {object_name}")
                 return url
@@ -214,3 +369,154 @@ class S3Client:
         except Exception as e:
             logger.error(f"Failed to upload video: {str(e)}")
             raise
+
+    async def upload_stream(self, stream: BinaryIO, object_name: str) -> str:
+        """
+        Upload a video of unknown length from a readable binary stream.
+
+        The stream is read in a worker thread and sent as a multipart upload,
+        so data can be uploaded while it is still being produced.
+
+        Args:
+            stream: Blocking file-like object to read the video from
+            object_name: Name of the object in the bucket
+
+        Returns:
+            URL of the uploaded video
+        """
+        try:
+            await self._ensure_target_bucket()
+
+            if self.minio_client:
+                await asyncio.to_thread(
+                    self.minio_client.put_object,
+                    self.target_bucket,
+                    object_name,
+                    stream,
+                    length=-1,
+                    part_size=MULTIPART_PART_SIZE,
+                    num_parallel_uploads=MULTIPART_CONCURRENCY,
+                    content_type='video/mp4'
+                )
+
+                url = self.minio_client.presigned_get_object(
+                    self.target_bucket,
+                    object_name,
+                    expires=timedelta(days=7)  # URL valid for 7 days
+                )
+
+                logger.info(f"Video streamed to MinIO: {object_name}")
+                return url
+
+            elif self.boto3_client:
+                await asyncio.to_thread(
+                    self.boto3_client.upload_fileobj,
+                    stream,
+                    self.target_bucket,
+                    object_name,
+                    ExtraArgs={'ContentType': 'video/mp4'},
+                    Config=TRANSFER_CONFIG
+                )
+
+                url = self._public_url_template.format(key=object_name)
+
+                logger.info(f"Video streamed to AWS S3: {object_name}")
+                return url
+            else:
+                raise Exception("No S3 client configured")
+
+        except Exception as e:
+            logger.error(f"Failed to upload video stream: {str(e)}")
+            raise
+
+    def local_staging_path(self, object_name: str) -> Optional[str]:
+        """
+        Get a path inside the local bucket directory to write an object to before upload.
+        
+        Writing there lets upload_video publish the object with a same-directory
+        rename instead of copying it.
+        
+        Args:
+            object_name: Name of the object in the bucket
+            
+        Returns:
+            Staging path, or None if the bucket is not on local disk
+        """
+        if not (self.minio_client and self.local_bucket_path):
+            return None
+        return os.path.join(self.local_bucket_path, f".part-{object_name}")
+    
+    def local_object_path(self, url: str) -> Optional[str]:
+        """
+        Resolve a URL of an object in the target bucket to its file on local disk.
+        
+        Only unexpired presigned URLs whose signature checks out are resolved,
+        so the shortcut grants no access that fetching the URL wouldn't.
+        
+        Args:
+            url: URL of the object, e.g. a presigned URL returned by upload_video
+            
+        Returns:
+            Path of the object's file, or None if the bucket is not on local
+            disk, the URL does not point into it or isn't validly presigned
+        """
+        if not (self.minio_client and self.local_bucket_path):
+            return None
+        
+        parsed = urlparse(url)
+        if parsed.hostname != self._minio_host:
+            return None
+        
+        bucket, _, key = parsed.path.lstrip('/').partition('/')
+        key = unquote(key)
+        if bucket != self.target_bucket or not key or key.startswith(".part-"):
+            return None
+        if not self._is_valid_presigned_get(bucket, key, parsed.query):
+            return None
+        
+        # Refuse keys that would resolve outside the bucket directory
+        root = os.path.realpath(self.local_bucket_path)
+        path = os.path.realpath(os.path.join(root, key))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            return None
+        return path
+    
+    def _is_valid_presigned_get(self, bucket: str, key: str, query: str) -> bool:
+        """Check that a URL query is an unexpired presigned GET signature for the object."""
+        params = dict(parse_qsl(query))
+        try:
+            signed_at = datetime.strptime(
+                params["X-Amz-Date"], "%Y%m%dT%H%M%SZ"
+            ).replace(tzinfo=timezone.utc)
+            expires = timedelta(seconds=int(params["X-Amz-Expires"]))
+            signature = params["X-Amz-Signature"]
+        except (KeyError, ValueError):
+            return False
+        
+        if datetime.now(timezone.utc) >= signed_at + expires:
+            return False
+        
+        # Re-sign the same request; any other query parameter changes the result
+        try:
+            expected_url = self.minio_client.get_presigned_url(
+                "GET", bucket, key, expires=expires, request_date=signed_at
+            )
+        except Exception as e:
+            logger.warning(f"Failed to verify presigned URL for {key}: {str(e)}")
+            return False
+        expected = dict(parse_qsl(urlparse(expected_url).query))
+        if expected.keys() != params.keys():
+            return False
+        return hmac.compare_digest(expected["X-Amz-Signature"], signature)
+    
+    def _move_to_local_bucket(self, file_path: str, object_name: str):
+        """Move a file into the local bucket directory, renaming when on the same filesystem."""
+        destination = os.path.join(self.local_bucket_path, object_name)
+        try:
+            os.replace(file_path, destination)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            # Different filesystem: fall back to copy + delete
+            fast_copy(file_path, destination)
+            os.remove(file_path)
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from minio import Minio
+from minio.error import S3Error
+
+from s3_client import S3Client
+
+BUCKET = "merged-videos"
+
+
+@pytest.fixture
+def client(tmp_path):
+    # Skip __init__, which connects to the storage backends
+    client = S3Client.__new__(S3Client)
+    client.minio_client = Minio(
+        "minio:9000", access_key="access", secret_key="secret", secure=False, region="us-east-1"
+    )
+    client.local_bucket_path = str(tmp_path / BUCKET)
+    client.target_bucket = BUCKET
+    client._minio_host = "minio"
+    (tmp_path / BUCKET).mkdir()
+    (tmp_path / BUCKET / "my video.mp4").write_bytes(b"video")
+    (tmp_path / "outside.mp4").write_bytes(b"secret")
+    return client
+
+
+def _presign(client, key, expires=timedelta(days=7), request_date=None):
+    return client.minio_client.get_presigned_url(
+        "GET", BUCKET, key, expires=expires, request_date=request_date
+    )
+
+
+def test_presigned_url_resolves_to_file(client):
+    path = client.local_object_path(_presign(client, "my video.mp4"))
+    assert path == f"{client.local_bucket_path}/my video.mp4"
+
+
+def test_unsigned_url_is_not_resolved(client):
+    assert client.local_object_path(f"http://minio:9000/{BUCKET}/my%20video.mp4") is None
+
+
+def test_tampered_signature_is_not_resolved(client):
+    url = _presign(client, "my video.mp4")
+    assert client.local_object_path(url[:-4] + "0000") is None
+
+
+def test_expired_url_is_not_resolved(client):
+    signed_at = datetime.now(timezone.utc) - timedelta(hours=2)
+    url = _presign(client, "my video.mp4", expires=timedelta(hours=1), request_date=signed_at)
+    assert client.local_object_path(url) is None
+
+
+def test_extra_query_parameters_are_not_resolved(client):
+    url = _presign(client, "my video.mp4") + "&response-content-type=text/html"
+    assert client.local_object_path(url) is None
+
+
+def test_other_host_bucket_or_staging_key_is_not_resolved(client):
+    url = _presign(client, "my video.mp4")
+    assert client.local_object_path(url.replace("minio:9000", "other:9000")) is None
+    assert client.local_object_path(url.replace(f"/{BUCKET}/", "/source-videos/")) is None
+    assert client.local_object_path(_presign(client, ".part-my video.mp4")) is None
+
+
+def test_traversal_outside_bucket_is_not_resolved(client):
+    assert client.local_object_path(_presign(client, "../outside.mp4")) is None
+
+
+def test_missing_object_is_not_resolved(client):
+    assert client.local_object_path(_presign(client, "missing.mp4")) is None
+
+
+def test_nothing_resolves_without_local_bucket(client):
+    url = _presign(client, "my video.mp4")
+    client.local_bucket_path = None
+    assert client.local_object_path(url) is None
+
+
+class _FilesystemMinio:
+    """Serves objects from the bucket directory, like MinIO's legacy FS mode."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def get_object(self, bucket, name):
+        return _Response((self.root / bucket / name).read_bytes())
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self):
+        return self.data
+
+    def close(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+class _ErasureCodedMinio:
+    """Files dropped into the bucket directory aren't objects on current MinIO."""
+
+    def get_object(self, bucket, name):
+        raise S3Error("NoSuchKey", "Object does not exist", name, "", "", None)
+
+
+def _unchecked_client(tmp_path, minio_client):
+    client = S3Client.__new__(S3Client)
+    client.minio_client = minio_client
+    client.target_bucket = BUCKET
+    client._configured_local_bucket_path = str(tmp_path / BUCKET)
+    client.local_bucket_path = None
+    (tmp_path / BUCKET).mkdir()
+    return client
+
+
+def test_local_bucket_path_enabled_when_minio_serves_it(tmp_path):
+    client = _unchecked_client(tmp_path, _FilesystemMinio(tmp_path))
+    client._enable_local_bucket_path()
+
+    assert client.local_bucket_path == str(tmp_path / BUCKET)
+    assert list((tmp_path / BUCKET).iterdir()) == []
+
+
+def test_local_bucket_path_disabled_when_minio_does_not_serve_it(tmp_path):
+    client = _unchecked_client(tmp_path, _ErasureCodedMinio())
+    client._enable_local_bucket_path()
+
+    assert client.local_bucket_path is None
+    assert client.local_staging_path("out.mp4") is None
+    assert list((tmp_path / BUCKET).iterdir()) == []
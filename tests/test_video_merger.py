@@ -0,0 +1,81 @@
+import pytest
+
+from video_merger import VideoMerger
+
+
+def _probe(width=1280, height=720, fps="30/1", pix_fmt="yuv420p", audio=None, duration="4.0"):
+    streams = [
+        {
+            "codec_type": "video",
+            "width": width,
+            "height": height,
+            "r_frame_rate": fps,
+            "pix_fmt": pix_fmt,
+        }
+    ]
+    if audio:
+        streams.append({"codec_type": "audio", "sample_rate": audio[0], "channels": audio[1]})
+    return {"streams": streams, "format": {"duration": duration} if duration else {}}
+
+
+@pytest.fixture
+def merger(tmp_path, monkeypatch):
+    monkeypatch.setenv("TEMP_DIR", str(tmp_path))
+    return VideoMerger(encoder="libx264")
+
+
+def test_matching_inputs_pass_through(merger):
+    probes = [_probe(audio=("44100", 2)), _probe(audio=("44100", 2))]
+    graph, has_audio = merger._concat_filter(["a.mp4", "b.mp4"], probes)
+
+    assert has_audio
+    assert graph == (
+        "[0:v:0]setsar=1[v0];[1:v:0]setsar=1[v1];"
+        "[v0][0:a:0][v1][1:a:0]concat=n=2:v=1:a=1[v][a]"
+    )
+
+
+def test_mixed_inputs_are_converted_to_the_first(merger):
+    probes = [
+        _probe(audio=("44100", 2)),
+        _probe(width=640, height=480, fps="25/1", pix_fmt="yuv444p", audio=("48000", 1)),
+    ]
+    graph, _ = merger._concat_filter(["a.mp4", "b.mp4"], probes)
+
+    assert "[1:v:0]scale=1280:720,setsar=1,fps=30/1,format=yuv420p[v1]" in graph
+    assert "[1:a:0]aformat=sample_rates=44100:channel_layouts=stereo[a1]" in graph
+    assert graph.endswith("[v0][0:a:0][v1][a1]concat=n=2:v=1:a=1[v][a]")
+
+
+def test_silent_clip_gets_silence_of_its_duration(merger):
+    probes = [_probe(audio=("44100", 2)), _probe(duration="2.5")]
+    graph, has_audio = merger._concat_filter(["a.mp4", "b.mp4"], probes)
+
+    assert has_audio
+    assert "anullsrc=r=44100:cl=stereo,atrim=duration=2.5[a1]" in graph
+
+
+def test_silent_clip_falls_back_to_video_stream_duration(merger):
+    silent = _probe(duration=None)
+    silent["streams"][0]["duration"] = "3.2"
+    graph, _ = merger._concat_filter(["a.mp4", "b.mp4"], [_probe(audio=("44100", 2)), silent])
+
+    assert "atrim=duration=3.2[a1]" in graph
+
+
+def test_silent_clip_without_any_duration_raises(merger):
+    probes = [_probe(audio=("44100", 2)), _probe(duration=None)]
+    with pytest.raises(ValueError, match="b.mp4"):
+        merger._concat_filter(["a.mp4", "b.mp4"], probes)
+
+
+def test_no_audio_anywhere_concatenates_video_only(merger):
+    graph, has_audio = merger._concat_filter(["a.mp4", "b.mp4"], [_probe(), _probe()])
+
+    assert not has_audio
+    assert graph.endswith("[v0][v1]concat=n=2:v=1:a=0[v]")
+
+
+def test_unreadable_input_raises(merger):
+    with pytest.raises(ValueError, match="b.mp4"):
+        merger._concat_filter(["a.mp4", "b.mp4"], [_probe(), None])
@@ -0,0 +1,151 @@
+import threading
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+from multidict import CIMultiDict
+
+from youtube_uploader import (
+    RETRY_BACKOFF_CAP,
+    YouTubeUploader,
+    _StreamBuffer,
+    _StreamingUpload,
+    _expected_crc32c,
+)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_put_blocks_at_capacity_until_close():
+    buffer = _StreamBuffer(capacity=4)
+    buffer.put(b"abcd")
+
+    writer = _start(buffer.put, b"efgh")
+    writer.join(0.2)
+    assert writer.is_alive()
+
+    buffer.close()
+    writer.join(1)
+    assert not writer.is_alive()
+
+
+def test_put_resumes_once_reader_releases_bytes():
+    buffer = _StreamBuffer(capacity=4)
+    buffer.put(b"abcd")
+
+    writer = _start(buffer.put, b"efgh")
+    writer.join(0.2)
+    assert writer.is_alive()
+
+    assert buffer.read(2, 2) == b"cd"
+    writer.join(1)
+    assert not writer.is_alive()
+    assert buffer.read(4, 4) == b"efgh"
+
+
+def test_read_of_released_offset_raises():
+    buffer = _StreamBuffer(capacity=16)
+    buffer.put(b"abcdefgh")
+    buffer.read(4, 4)
+
+    with pytest.raises(Exception, match="already released"):
+        buffer.read(0, 4)
+
+
+def test_current_chunk_can_be_read_again():
+    buffer = _StreamBuffer(capacity=16)
+    buffer.put(b"abcdefgh")
+
+    assert buffer.read(4, 4) == b"efgh"
+    # A failed request re-sends the same chunk
+    assert buffer.read(4, 4) == b"efgh"
+
+
+def test_read_waits_for_bytes_and_returns_short_at_end():
+    buffer = _StreamBuffer(capacity=16)
+    result = []
+    reader = _start(lambda: result.append(buffer.read(0, 8)))
+    reader.join(0.2)
+    assert reader.is_alive()
+
+    buffer.put(b"abc")
+    buffer.finish()
+    reader.join(1)
+    assert result == [b"abc"]
+
+
+def test_download_error_is_raised_to_reader():
+    buffer = _StreamBuffer(capacity=16)
+    buffer.put(b"abc")
+    buffer.finish(RuntimeError("connection reset"))
+
+    with pytest.raises(Exception, match="connection reset"):
+        buffer.read(0, 8)
+
+
+def test_streaming_upload_reports_size_only_when_last_chunk_is_known():
+    buffer = _StreamBuffer(capacity=64)
+    media = _StreamingUpload(buffer, chunksize=4)
+    buffer.put(b"abcde")
+
+    # More than one chunk is available, but the download isn't over
+    assert media.size() is None
+    assert media.getbytes(0, 4) == b"abcd"
+
+    buffer.finish()
+    assert media.size() == 5
+    assert media.getbytes(4, 4) == b"e"
+
+
+def test_streaming_upload_with_exact_chunk_multiple():
+    buffer = _StreamBuffer(capacity=64)
+    media = _StreamingUpload(buffer, chunksize=4)
+    buffer.put(b"abcdefgh")
+    buffer.finish()
+
+    assert media.getbytes(0, 4) == b"abcd"
+    assert media.size() == 8
+    assert media.getbytes(4, 4) == b"efgh"
+
+
+def test_expected_crc32c_with_several_values_in_one_header():
+    headers = CIMultiDict({"X-Goog-Hash": "md5=XrY7u+Ae7tCTyyK7j1rNww==, crc32c=n03x6A=="})
+    assert _expected_crc32c(headers) == "n03x6A=="
+
+
+def test_expected_crc32c_with_repeated_headers():
+    headers = CIMultiDict(
+        [("X-Goog-Hash", "md5=XrY7u+Ae7tCTyyK7j1rNww=="), ("X-Goog-Hash", "crc32c=n03x6A==")]
+    )
+    assert _expected_crc32c(headers) == "n03x6A=="
+
+
+def test_expected_crc32c_missing_or_encoded():
+    assert _expected_crc32c(CIMultiDict()) is None
+    assert _expected_crc32c(CIMultiDict({"X-Goog-Hash": "md5=XrY7u+Ae7tCTyyK7j1rNww=="})) is None
+    assert (
+        _expected_crc32c(
+            CIMultiDict({"X-Goog-Hash": "crc32c=n03x6A==", "Content-Encoding": "gzip"})
+        )
+        is None
+    )
+
+
+def _http_error(headers):
+    return HttpError(httplib2.Response({"status": "503", **headers}), b"")
+
+
+def test_retry_after_is_capped():
+    uploader = YouTubeUploader.__new__(YouTubeUploader)
+    assert uploader._retry_delay(_http_error({"retry-after": "3600"}), 1) == RETRY_BACKOFF_CAP
+    assert uploader._retry_delay(_http_error({"retry-after": "3"}), 1) == 3
+
+
+def test_backoff_with_jitter_is_capped():
+    uploader = YouTubeUploader.__new__(YouTubeUploader)
+    delays = [uploader._retry_delay(_http_error({}), 10) for _ in range(50)]
+    assert all(RETRY_BACKOFF_CAP / 2 <= delay <= RETRY_BACKOFF_CAP for delay in delays)
@@ -1,21 +1,117 @@
 import os
+import json
+import asyncio
 import logging
-from typing import List
-from moviepy.editor import VideoFileClip, concatenate_videoclips
+import mmap
+import shutil
+import subprocess
+import tempfile
+from fractions import Fraction
+from typing import Awaitable, BinaryIO, Callable, List, TypeVar
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Stream properties that must match for inputs to be concatenated without
+# re-encoding. The concat demuxer keeps only the first file's codec extradata
+# (e.g. H.264 SPS/PPS), so it has to be byte-identical across inputs.
+STREAM_COPY_KEYS = (
+    "codec_type",
+    "codec_name",
+    "profile",
+    "level",
+    "extradata_size",
+    "extradata_hash",
+    "width",
+    "height",
+    "pix_fmt",
+    "r_frame_rate",
+    "time_base",
+    "sample_rate",
+    "channels",
+)
+
+# Audio format every input is converted to when re-encoding
+REENCODE_SAMPLE_RATE = 44100
+REENCODE_CHANNEL_LAYOUT = "stereo"
+REENCODE_CHANNELS = 2
+
+
+class _FFmpegOutput:
+    """
+    Blocking reader over an FFmpeg process's stdout.
+
+    Raises at EOF if FFmpeg exited with an error, so a consumer never mistakes
+    a truncated stream for a complete video.
+    """
+
+    def __init__(self, proc: subprocess.Popen, errors: BinaryIO):
+        self._proc = proc
+        self._errors = errors
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._proc.stdout.read(size)
+        if not data and size != 0 and self._proc.wait() != 0:
+            self._errors.seek(0)
+            raise Exception(
+                f"FFmpeg concat failed: {self._errors.read().decode().strip()}"
+            )
+        return data
+
 
 class VideoMerger:
-    def __init__(self):
-        """Initialize video merger."""
+    def __init__(self, encoder: str | None = None):
+        """
+        Initialize video merger.
+
+        Args:
+            encoder: FFmpeg video encoder to use. Defaults to the VIDEO_ENCODER
+                environment variable, or h264_nvenc when an NVIDIA GPU is
+                available and libx264 otherwise.
+        """
         self.temp_dir = os.getenv("TEMP_DIR", "./temp")
         os.makedirs(self.temp_dir, exist_ok=True)
 
+        self.ffmpeg_binary = os.getenv("FFMPEG_BINARY", "ffmpeg")
+        self.ffprobe_binary = os.getenv("FFPROBE_BINARY", "ffprobe")
+
+        self.encoder = encoder or os.getenv("VIDEO_ENCODER") or self._detect_encoder()
+        logger.info(f"Using video encoder: {self.encoder}")
+
+    def _detect_encoder(self) -> str:
+        """Pick the NVENC hardware encoder if both the GPU and FFmpeg support it."""
+        if shutil.which("nvidia-smi") is None:
+            return "libx264"
+
+        try:
+            gpus = subprocess.run(
+                ["nvidia-smi", "-L"], capture_output=True, text=True, timeout=10
+            )
+            if gpus.returncode != 0 or not gpus.stdout.strip():
+                return "libx264"
+
+            encoders = subprocess.run(
+                [self.ffmpeg_binary, "-hide_banner", "-encoders"],
+                capture_output=True,
+                text=True,
+                timeout=10,
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Failed to detect hardware encoder: {str(e)}")
+            return "libx264"
+
+        return "h264_nvenc" if "h264_nvenc" in encoders.stdout else "libx264"
+
     async def merge_videos(self, video_paths: List[str], output_path: str) -> str:
         """
         Merge multiple video files into a single MP4 file.
 
+        Inputs that share codec, resolution and frame rate are concatenated
+        with FFmpeg's concat demuxer without re-encoding; anything else is
+        scaled to the first video's size and frame rate and re-encoded with
+        FFmpeg's concat filter.
+
         Args:
             video_paths: List of paths to video files to merge
             output_path: Path where the merged video will be saved
@@ -23,93 +119,24 @@ class VideoMerger:
         Returns:
             Path to the merged video file
         """
-        clips = []
+        self._validate_inputs(video_paths)
+        probes = await self._probe_inputs(video_paths)
+        return await self._merge_to_file(video_paths, probes, output_path)
 
+    async def _merge_to_file(
+        self, video_paths: List[str], probes: List[dict | None], output_path: str
+    ) -> str:
+        """Merge probed inputs into output_path, choosing remux or re-encode."""
         try:
-            logger.info(f"Loading {len(video_paths)} video clips...")
-
-            # Load all video clips
-            for i, video_path in enumerate(video_paths):
-                if not os.path.exists(video_path):
-                    raise FileNotFoundError(f"Video file not found: {video_path}")
-
-                if not video_path.lower().endswith(".mp4"):
-                    raise ValueError(f"Only MP4 files are supported. Got: {video_path}")
-
-                try:
-                    clip = VideoFileClip(video_path)
-                    clips.append(clip)
-                    logger.info(
-                        f"Loaded clip {i + 1}/{len(video_paths)}: {video_path} (duration: {clip.duration:.2f}s)"
-                    )
-                except Exception as e:
-                    logger.error(f"Failed to load video clip {video_path}: {str(e)}")
-                    raise ValueError(
-                        f"Failed to load video clip {video_path}: {str(e)}"
-                    )
-
-            if not clips:
-                raise ValueError("No valid video clips to merge")
-
-            # Ensure all clips have the same fps and size for consistency
-            logger.info("Standardizing video properties...")
-            standardized_clips = []
-
-            # Use the first clip's properties as reference
-            reference_clip = clips[0]
-            target_fps = reference_clip.fps
-            target_size = reference_clip.size
-
-            logger.info(f"Target properties - FPS: {target_fps}, Size: {target_size}")
-
-            for i, clip in enumerate(clips):
-                try:
-                    # Resize if necessary
-                    if clip.size != target_size:
-                        logger.info(
-                            f"Resizing clip {i + 1} from {clip.size} to {target_size}"
-                        )
-                        clip = clip.resize(target_size)
-
-                    # Adjust fps if necessary
-                    if abs(clip.fps - target_fps) > 0.1:  # Allow small fps differences
-                        logger.info(
-                            f"Adjusting FPS for clip {i + 1} from {clip.fps} to {target_fps}"
-                        )
-                        clip = clip.set_fps(target_fps)
-
-                    standardized_clips.append(clip)
-
-                except Exception as e:
-                    logger.error(f"Failed to standardize clip {i + 1}: {str(e)}")
-                    # Use original clip if standardization fails
-                    standardized_clips.append(clip)
-
-            # Concatenate all clips
-            logger.info("Concatenating video clips...")
-            final_clip = concatenate_videoclips(standardized_clips, method="compose")
-
-            logger.info(f"Final video duration: {final_clip.duration:.2f} seconds")
-
-            # Write the final video
-            logger.info(f"Writing merged video to: {output_path}")
-            final_clip.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile="temp-audio.m4a",
-                remove_temp=True,
-                verbose=False,
-                logger=None,  # Disable moviepy's own logging to avoid clutter
-            )
+            if self._can_stream_copy(probes):
+                logger.info("Input videos are compatible, concatenating without re-encoding")
+                await self._concat_stream_copy(video_paths, output_path)
+            else:
+                logger.info("Input videos differ, re-encoding with FFmpeg")
+                await self._concat_reencode(video_paths, probes, output_path)
 
             # Verify the output file
-            if not os.path.exists(output_path):
-                raise Exception("Failed to create merged video file")
-
-            file_size = os.path.getsize(output_path)
-            if file_size == 0:
-                raise Exception("Merged video file is empty")
+            file_size = self._verify_output(output_path)
 
             logger.info(
                 f"Successfully created merged video: {output_path} (size: {file_size / (1024 * 1024):.2f} MB)"
@@ -127,19 +154,329 @@ class VideoMerger:
                     pass
             raise
 
+    def _verify_output(self, output_path: str) -> int:
+        """Check the merged file exists and starts with an MP4 header; return its size."""
+        if not os.path.exists(output_path):
+            raise Exception("Failed to create merged video file")
+
+        with open(output_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                raise Exception("Merged video file is empty")
+
+            # Map rather than read so checks never pull the whole file into memory
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm[4:8] != b"ftyp":
+                    raise Exception("Merged video file is not a valid MP4")
+                return len(mm)
+
+    async def merge_videos_streaming(
+        self,
+        video_paths: List[str],
+        output_path: str,
+        consume: Callable[[BinaryIO], Awaitable[T]],
+    ) -> T:
+        """
+        Merge multiple video files and hand the result to a consumer as a stream.
+
+        Compatible inputs are remuxed by FFmpeg straight into a pipe as
+        fragmented MP4, so the consumer (e.g. an upload) runs while FFmpeg is
+        still writing and nothing is written to disk. Other inputs are merged
+        to output_path first and the file is opened for the consumer.
+
+        Args:
+            video_paths: List of paths to video files to merge
+            output_path: Path used for the merged video when re-encoding
+            consume: Coroutine function reading the merged video from a
+                blocking file-like object; it must read until EOF
+
+        Returns:
+            Whatever the consumer returns
+        """
+        self._validate_inputs(video_paths)
+        probes = await self._probe_inputs(video_paths)
+
+        if not self._can_stream_copy(probes):
+            await self._merge_to_file(video_paths, probes, output_path)
+            with open(output_path, "rb") as f:
+                return await consume(f)
+
+        logger.info("Input videos are compatible, streaming concatenation without re-encoding")
+        try:
+            return await self._concat_to_consumer(video_paths, consume)
+        except Exception as e:
+            logger.error(f"Error during streaming video merge: {str(e)}")
+            raise
+
+    def _validate_inputs(self, video_paths: List[str]):
+        """Check the inputs exist and are MP4 files, and start prefetching them."""
+        for video_path in video_paths:
+            if not os.path.exists(video_path):
+                raise FileNotFoundError(f"Video file not found: {video_path}")
+
+            if not video_path.lower().endswith(".mp4"):
+                raise ValueError(f"Only MP4 files are supported. Got: {video_path}")
+
+            self._prefetch(video_path)
+
+        if not video_paths:
+            raise ValueError("No valid video clips to merge")
+
+    async def _probe(self, video_path: str) -> dict | None:
+        """Get the stream properties and duration of a file with ffprobe."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                self.ffprobe_binary,
+                "-v",
+                "error",
+                "-show_data_hash",
+                "CRC32",
+                "-show_entries",
+                "stream=" + ",".join(STREAM_COPY_KEYS) + ",duration:format=duration",
+                "-of",
+                "json",
+                video_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, stderr = await proc.communicate()
+        except OSError as e:
+            logger.warning(f"Failed to run ffprobe: {str(e)}")
+            return None
+
+        if proc.returncode != 0:
+            logger.warning(f"ffprobe failed for {video_path}: {stderr.decode().strip()}")
+            return None
+
+        return json.loads(stdout)
+
+    async def _probe_inputs(self, video_paths: List[str]) -> List[dict | None]:
+        """Probe all inputs concurrently."""
+        return await asyncio.gather(*(self._probe(path) for path in video_paths))
+
+    def _stream(self, probe: dict, codec_type: str) -> dict | None:
+        """First stream of the given type in a probe result."""
+        for stream in probe.get("streams", []):
+            if stream.get("codec_type") == codec_type:
+                return stream
+        return None
+
+    def _can_stream_copy(self, probes: List[dict | None]) -> bool:
+        """Check whether all inputs have identical stream parameters."""
+        if any(probe is None for probe in probes):
+            return False
+
+        signatures = [
+            [
+                tuple(stream.get(key) for key in STREAM_COPY_KEYS)
+                for stream in probe.get("streams", [])
+                if stream.get("codec_type") in ("video", "audio")
+            ]
+            for probe in probes
+        ]
+        return all(signature == signatures[0] for signature in signatures)
+
+    def _concat_filter(self, video_paths: List[str], probes: List[dict | None]) -> tuple[str, bool]:
+        """
+        Build a filter graph that scales every input to the first one and concatenates them.
+
+        Returns:
+            The filter graph and whether it has an audio output
+        """
+        for video_path, probe in zip(video_paths, probes):
+            if probe is None or self._stream(probe, "video") is None:
+                raise ValueError(f"Failed to load video clip {video_path}")
+
+        # Use the first clip's properties as reference
+        reference = self._stream(probes[0], "video")
+        width, height = reference["width"], reference["height"]
+        fps = reference["r_frame_rate"]
+        logger.info(f"Target properties - FPS: {fps}, Size: {width}x{height}")
+
+        has_audio = any(self._stream(probe, "audio") for probe in probes)
+
+        filters = []
+        segments = []
+        for i, (video_path, probe) in enumerate(zip(video_paths, probes)):
+            # Only convert what differs from the target so matching inputs pass through
+            video = self._stream(probe, "video")
+            chain = []
+            if (video.get("width"), video.get("height")) != (width, height):
+                chain.append(f"scale={width}:{height}")
+            # Metadata only, but concat requires every segment to share it
+            chain.append("setsar=1")
+            if video.get("r_frame_rate") != fps:
+                chain.append(f"fps={fps}")
+            if video.get("pix_fmt") != "yuv420p":
+                chain.append("format=yuv420p")
+            filters.append(f"[{i}:v:0]{','.join(chain)}[v{i}]")
+
+            if not has_audio:
+                segments.append(f"[v{i}]")
+                continue
+
+            audio = self._stream(probe, "audio")
+            if audio is None:
+                # Fill silent clips so audio stays in sync with video
+                duration = probe.get("format", {}).get("duration") or video.get("duration")
+                if duration is None:
+                    raise ValueError(f"Failed to get the duration of silent clip {video_path}")
+                filters.append(
+                    f"anullsrc=r={REENCODE_SAMPLE_RATE}:cl={REENCODE_CHANNEL_LAYOUT},"
+                    f"atrim=duration={duration}[a{i}]"
+                )
+                segments.append(f"[v{i}][a{i}]")
+            elif (audio.get("sample_rate"), audio.get("channels")) == (
+                str(REENCODE_SAMPLE_RATE),
+                REENCODE_CHANNELS,
+            ):
+                segments.append(f"[v{i}][{i}:a:0]")
+            else:
+                filters.append(
+                    f"[{i}:a:0]aformat=sample_rates={REENCODE_SAMPLE_RATE}"
+                    f":channel_layouts={REENCODE_CHANNEL_LAYOUT}[a{i}]"
+                )
+                segments.append(f"[v{i}][a{i}]")
+
+        outputs = "[v][a]" if has_audio else "[v]"
+        filters.append(
+            f"{''.join(segments)}concat=n={len(probes)}:v=1:a={int(has_audio)}{outputs}"
+        )
+        return ";".join(filters), has_audio
+
+    async def _concat_reencode(
+        self, video_paths: List[str], probes: List[dict | None], output_path: str
+    ):
+        """Concatenate differing inputs with FFmpeg's concat filter, re-encoding once."""
+        filter_graph, has_audio = self._concat_filter(video_paths, probes)
+
+        args = [self.ffmpeg_binary, "-y", "-loglevel", "error"]
+        for video_path in video_paths:
+            args += ["-i", video_path]
+        args += ["-filter_complex", filter_graph, "-map", "[v]"]
+        if has_audio:
+            args += ["-map", "[a]", "-c:a", "aac"]
+        args += [
+            "-c:v",
+            self.encoder,
+            # NVENC only understands its own preset names
+            "-preset",
+            "fast" if "nvenc" in self.encoder else "veryfast",
+            # Put the moov atom first so players can start before the download ends
+            "-movflags",
+            "+faststart",
+            output_path,
+        ]
+
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+
+        if proc.returncode != 0:
+            raise Exception(f"FFmpeg re-encode failed: {stderr.decode().strip()}")
+
+    def _write_concat_list(self, video_paths: List[str]) -> str:
+        """Write the file list read by FFmpeg's concat demuxer and return its path.
+
+        The list goes in the temp directory rather than next to the output, which
+        may be the bucket directory itself when the merge is staged there.
+        """
+        fd, list_path = tempfile.mkstemp(suffix="_concat.txt")
+        with os.fdopen(fd, "w") as f:
+            for video_path in video_paths:
+                escaped = os.path.abspath(video_path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+        return list_path
+
+    def _concat_command(self, list_path: str) -> List[str]:
+        """FFmpeg arguments up to the output for a stream-copy concat."""
+        return [
+            self.ffmpeg_binary,
+            "-y",
+            "-loglevel",
+            "error",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            list_path,
+            "-c",
+            "copy",
+        ]
+
+    async def _concat_stream_copy(self, video_paths: List[str], output_path: str):
+        """Concatenate compatible inputs with FFmpeg's concat demuxer (-c copy)."""
+        list_path = self._write_concat_list(video_paths)
+
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self._concat_command(list_path),
+                # Put the moov atom first so players can start before the download ends
+                "-movflags",
+                "+faststart",
+                output_path,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            _, stderr = await proc.communicate()
+
+            if proc.returncode != 0:
+                raise Exception(f"FFmpeg concat failed: {stderr.decode().strip()}")
         finally:
-            # Clean up clip objects to free memory
-            for clip in clips:
-                try:
-                    clip.close()
-                except:
-                    pass
+            os.remove(list_path)
+
+    async def _concat_to_consumer(
+        self,
+        video_paths: List[str],
+        consume: Callable[[BinaryIO], Awaitable[T]],
+    ) -> T:
+        """Stream-copy compatible inputs as fragmented MP4 into `consume`."""
+        list_path = self._write_concat_list(video_paths)
+
+        errors = tempfile.TemporaryFile()
+        try:
+            proc = subprocess.Popen(
+                [
+                    *self._concat_command(list_path),
+                    # A pipe can't be seeked back to write the moov atom
+                    "-movflags",
+                    "+frag_keyframe+empty_moov+default_base_moof",
+                    "-f",
+                    "mp4",
+                    "pipe:1",
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=errors,
+            )
+            try:
+                return await consume(_FFmpegOutput(proc, errors))
+            finally:
+                # Closing stdout stops FFmpeg if the consumer gave up early
+                proc.stdout.close()
+                await asyncio.to_thread(proc.wait)
+        finally:
+            errors.close()
+            os.remove(list_path)
 
+    def _prefetch(self, video_path: str):
+        """Ask the kernel to start reading a video into the page cache ahead of the decoder."""
+        if not hasattr(os, "posix_fadvise"):
+            return
+
+        try:
+            fd = os.open(video_path, os.O_RDONLY)
             try:
-                if "final_clip" in locals():
-                    final_clip.close()
-            except:
-                pass
+                # Inputs are read front to back, so a larger readahead window helps
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            logger.debug(f"Could not prefetch {video_path}: {str(e)}")
 
     def get_video_info(self, video_path: str) -> dict:
         """
@@ -152,15 +489,31 @@ class VideoMerger:
             Dictionary containing video information
         """
         try:
-            clip = VideoFileClip(video_path)
-            info = {
-                "duration": clip.duration,
-                "fps": clip.fps,
-                "size": clip.size,
+            result = subprocess.run(
+                [
+                    self.ffprobe_binary,
+                    "-v",
+                    "error",
+                    "-select_streams",
+                    "v:0",
+                    "-show_entries",
+                    "stream=width,height,r_frame_rate:format=duration",
+                    "-of",
+                    "json",
+                    video_path,
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            probe = json.loads(result.stdout)
+            stream = probe["streams"][0]
+            return {
+                "duration": float(probe["format"]["duration"]),
+                "fps": float(Fraction(stream["r_frame_rate"])),
+                "size": [stream["width"], stream["height"]],
                 "file_size": os.path.getsize(video_path),
             }
-            clip.close()
-            return info
         except Exception as e:
             logger.error(f"Failed to get video info for {video_path}: {str(e)}")
             return {}
@@ -1,19 +1,194 @@
 import os
+import time
+import random
 import logging
+import asyncio
+import contextlib
+import threading
 import aiohttp
-import aiofiles
-import tempfile
-import json
-from typing import List, Dict, Any
+import base64
+import orjson
+import requests
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List
+from urllib.parse import urlencode
+import google_crc32c
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
+from googleapiclient.http import MediaFileUpload, MediaUpload
+from s3_client import DOWNLOAD_TIMEOUT
 
 logger = logging.getLogger(__name__)
 
+# Default resumable upload chunk size; bounds memory per upload and lets a
+# failed request resume from the last committed chunk. Chunk sizes must be a
+# multiple of UPLOAD_CHUNK_GRANULARITY.
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_CHUNK_GRANULARITY = 256 * 1024
+
+# Files up to this size are sent in a single multipart request instead of
+# opening a resumable session first; the whole file is then held in memory
+SIMPLE_UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+
+# Chunks of download buffered ahead of a streaming upload; holds the chunk
+# being sent (for retries) plus the next one, which must arrive before the
+# upload can tell whether the current chunk is the last
+STREAMING_BUFFER_CHUNKS = 3
+
+# Seconds between download progress log lines
+PROGRESS_LOG_INTERVAL = 2
+
+# Upload errors worth retrying (rate limiting and server errors), how many
+# times, and the longest backoff in seconds between attempts
+RETRIABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+MAX_UPLOAD_RETRIES = 7
+RETRY_BACKOFF_CAP = 64
+
+# Threads running blocking YouTube API uploads
+UPLOAD_WORKERS = 4
+
+# Cached credentials are refreshed once they're this close to expiring, while
+# the current token can still be used if the refresh fails
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# Resource parts sent with videos.insert and requested by videos.list
+VIDEO_INSERT_PARTS = "snippet,status"
+VIDEO_INFO_PARTS = "snippet,status,statistics"
+
+
+def _expected_crc32c(headers) -> str | None:
+    """
+    Get the base64 CRC32C of a response body from its X-Goog-Hash headers.
+
+    Returns None when there is none, or when the body is content-encoded and
+    the hash covers the stored bytes rather than the ones received.
+    """
+    if "Content-Encoding" in headers:
+        return None
+    for header in headers.getall("X-Goog-Hash", ()):
+        for value in header.split(","):
+            name, _, digest = value.strip().partition("=")
+            if name == "crc32c":
+                return digest
+    return None
+
+
+class _StreamBuffer:
+    """
+    Bounded buffer between a download and the upload thread reading it.
+
+    Bytes are kept from the start of the chunk the upload last requested, so
+    the resumable protocol can re-send that chunk after a failed request.
+    The writer blocks while `capacity` bytes are buffered.
+    """
+
+    def __init__(self, capacity: int):
+        self._condition = threading.Condition()
+        self._capacity = capacity
+        self._buffer = bytearray()
+        self._start = 0  # Stream offset of the first buffered byte
+        self.done = False
+        self.closed = False
+        self.error = None
+
+    def put(self, data: bytes):
+        """Append downloaded bytes, blocking while the buffer is full."""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or len(self._buffer) < self._capacity
+            )
+            if self.closed:
+                return
+            self._buffer += data
+            self._condition.notify_all()
+
+    def finish(self, error: BaseException | None = None):
+        """Mark the download as complete, or failed if an error is given."""
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    def close(self):
+        """Drop the buffered bytes and stop blocking the writer; the upload is over."""
+        with self._condition:
+            self.closed = True
+            self._buffer = bytearray()
+            self._condition.notify_all()
+
+    def wait_for(self, offset: int) -> tuple[int, bool]:
+        """
+        Block until at least `offset` bytes are downloaded or the download ends.
+
+        Returns:
+            Tuple of (bytes downloaded, whether the download is complete)
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.done or self._start + len(self._buffer) >= offset
+            )
+            if self.error is not None:
+                raise Exception(f"Download failed: {self.error}")
+            return self._start + len(self._buffer), self.done
+
+    def read(self, begin: int, length: int) -> bytes:
+        """Return up to `length` bytes from `begin`, releasing everything before it."""
+        with self._condition:
+            self.wait_for(begin + length)
+            if begin < self._start:
+                raise Exception(f"Stream offset {begin} was already released")
+
+            del self._buffer[: begin - self._start]
+            self._start = begin
+            self._condition.notify_all()
+            return bytes(self._buffer[:length])
+
+
+class _StreamingUpload(MediaUpload):
+    """Resumable media body that uploads a video while it is still being downloaded."""
+
+    def __init__(
+        self,
+        buffer: _StreamBuffer,
+        chunksize: int = UPLOAD_CHUNK_SIZE,
+        mimetype: str = "video/mp4",
+    ):
+        self._buffer = buffer
+        self._chunksize = chunksize
+        self._mimetype = mimetype
+        self._served = 0
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        # Wait until the next chunk is known not to be the last one, or the
+        # download has ended; only then is the total size reported so the
+        # final chunk is sent with the correct Content-Range.
+        written, done = self._buffer.wait_for(self._served + self._chunksize + 1)
+        return written if done else None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        data = self._buffer.read(begin, length)
+        self._served = max(self._served, begin + len(data))
+        return data
+
+    def close(self):
+        self._buffer.close()
+
 
 class YouTubeUploader:
     def __init__(self):
@@ -26,8 +201,101 @@ class YouTubeUploader:
         self.api_service_name = "youtube"
         self.api_version = "v3"
 
+        # Round the configured chunk size down to what the API accepts
+        chunk_size = int(os.getenv("YOUTUBE_UPLOAD_CHUNKSIZE", UPLOAD_CHUNK_SIZE))
+        self.upload_chunk_size = (
+            max(chunk_size // UPLOAD_CHUNK_GRANULARITY, 1) * UPLOAD_CHUNK_GRANULARITY
+        )
+
+        # Credentials are shared and reused while valid; each thread caches its
+        # own service because the underlying httplib2 connection isn't thread-safe
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+        self._thread_local = threading.local()
+
+        # Shared aiohttp session, assigned by the application on startup;
+        # standalone use creates one on the first download instead
+        self.http_session: aiohttp.ClientSession | None = None
+        self._own_session: aiohttp.ClientSession | None = None
+
+        # Uploads block for minutes, so they get their own threads instead of
+        # tying up the default executor (which the streamed download also uses)
+        self._executor = ThreadPoolExecutor(
+            max_workers=UPLOAD_WORKERS, thread_name_prefix="youtube-upload"
+        )
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the session to download with, creating one on first use if none was assigned."""
+        if self.http_session is not None:
+            return self.http_session
+
+        if self._own_session is None or self._own_session.closed:
+            self._own_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=20,
+                    keepalive_timeout=75,
+                    ttl_dns_cache=300,
+                    enable_cleanup_closed=True,
+                ),
+                timeout=DOWNLOAD_TIMEOUT,
+            )
+        return self._own_session
+
+    async def close(self):
+        """Close the session created by the uploader, if any, and stop the upload threads."""
+        if self._own_session is not None:
+            await self._own_session.close()
+            self._own_session = None
+        self._executor.shutdown(wait=False)
+
     def _get_authenticated_service(self):
-        """Get authenticated YouTube API service."""
+        """Get authenticated YouTube API service for the calling thread."""
+        credentials = self._get_credentials()
+
+        local = self._thread_local
+        if getattr(local, "credentials", None) is not credentials:
+            local.service = build(
+                self.api_service_name,
+                self.api_version,
+                credentials=credentials,
+                static_discovery=True,  # Use the bundled discovery document
+            )
+            local.credentials = credentials
+        return local.service
+
+    def _get_credentials(self):
+        """Get valid credentials, loading, refreshing or requesting them only when needed."""
+        with self._credentials_lock:
+            credentials = self._credentials
+            if credentials is not None and credentials.valid:
+                if self._expires_soon(credentials):
+                    self._refresh_early(credentials)
+                return credentials
+
+            self._credentials = self._load_credentials()
+            return self._credentials
+
+    @staticmethod
+    def _expires_soon(credentials) -> bool:
+        """Whether refreshable credentials expire within TOKEN_REFRESH_MARGIN."""
+        if not credentials.refresh_token or credentials.expiry is None:
+            return False
+        # google-auth stores expiry as naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return credentials.expiry - now < TOKEN_REFRESH_MARGIN
+
+    def _refresh_early(self, credentials):
+        """Refresh still-valid credentials, keeping the current token on failure."""
+        try:
+            credentials.refresh(Request())
+            logger.info("Refreshed YouTube API credentials ahead of expiry")
+        except Exception as e:
+            logger.warning(f"Early credential refresh failed, using current token: {e}")
+            return
+        self._save_credentials(credentials)
+
+    def _load_credentials(self):
+        """Load credentials from the token file, refreshing or replacing them if invalid."""
         credentials = None
 
         # Load existing token
@@ -52,15 +320,18 @@ class YouTubeUploader:
             if not credentials:
                 credentials = self._get_new_credentials()
 
-            # Save credentials
-            try:
-                with open(self.token_file, "w") as token:
-                    token.write(credentials.to_json())
-                logger.info("Saved YouTube API credentials")
-            except Exception as e:
-                logger.warning(f"Failed to save credentials: {e}")
+            self._save_credentials(credentials)
 
-        return build(self.api_service_name, self.api_version, credentials=credentials)
+        return credentials
+
+    def _save_credentials(self, credentials):
+        """Write credentials to the token file."""
+        try:
+            with open(self.token_file, "w") as token:
+                token.write(credentials.to_json())
+            logger.info("Saved YouTube API credentials")
+        except Exception as e:
+            logger.warning(f"Failed to save credentials: {e}")
 
     def _get_new_credentials(self):
         """Get new credentials using device flow for Docker/VPS compatibility."""
@@ -111,31 +382,25 @@ class YouTubeUploader:
 
     def _manual_device_flow(self, flow):
         """Manual implementation of device flow if run_console doesn't work."""
-        import urllib.parse
-        import urllib.request
-        import time
-
         # Load client config
-        with open(self.credentials_file, "r") as f:
-            client_config = json.load(f)
+        with open(self.credentials_file, "rb") as f:
+            client_config = orjson.loads(f.read())
 
         client_id = client_config["installed"]["client_id"]
 
-        # Step 1: Get device code
-        device_code_url = "https://oauth2.googleapis.com/device/code"
-        device_data = {"client_id": client_id, "scope": " ".join(self.scopes)}
-
-        device_req = urllib.request.Request(
-            device_code_url,
-            data=urllib.parse.urlencode(device_data).encode(),
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        )
+        # One session for the device code request and every poll, so they all
+        # share a single keep-alive connection to Google's OAuth endpoint
+        with requests.Session() as http:
+            # Step 1: Get device code
+            device_code_url = "https://oauth2.googleapis.com/device/code"
+            device_data = {"client_id": client_id, "scope": " ".join(self.scopes)}
 
-        with urllib.request.urlopen(device_req) as response:
-            device_response = json.loads(response.read().decode())
+            response = http.post(device_code_url, data=device_data, timeout=30)
+            response.raise_for_status()
+            device_response = orjson.loads(response.content)
 
-        # Display instructions
-        logger.info(f"""
+            # Display instructions
+            logger.info(f"""
 📋 AUTHENTICATION REQUIRED
 {"=" * 60}
 
@@ -150,31 +415,32 @@ class YouTubeUploader:
 
 """)
 
-        # Step 2: Poll for token
-        token_url = "https://oauth2.googleapis.com/token"
-        poll_data = {
-            "client_id": client_id,
-            "client_secret": client_config["installed"]["client_secret"],
-            "device_code": device_response["device_code"],
-            "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
-        }
-
-        interval = device_response.get("interval", 5)
-        expires_in = device_response.get("expires_in", 1800)
-        start_time = time.time()
-
-        while time.time() - start_time < expires_in:
-            time.sleep(interval)
-
-            poll_req = urllib.request.Request(
-                token_url,
-                data=urllib.parse.urlencode(poll_data).encode(),
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-            )
+            # Step 2: Poll for token
+            token_url = "https://oauth2.googleapis.com/token"
+            poll_data = {
+                "client_id": client_id,
+                "client_secret": client_config["installed"]["client_secret"],
+                "device_code": device_response["device_code"],
+                "grant_type": "urn:ietf:params:oauth:grant-type:device_code",
+            }
+            # The poll request never changes, so encode it once for every poll
+            poll_body = urlencode(poll_data)
+            poll_headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
-            try:
-                with urllib.request.urlopen(poll_req) as response:
-                    token_response = json.loads(response.read().decode())
+            interval = device_response.get("interval", 5)
+            expires_in = device_response.get("expires_in", 1800)
+            # Monotonic, so wall clock adjustments can't cut the wait short
+            deadline = time.monotonic() + expires_in
+
+            while time.monotonic() < deadline:
+                time.sleep(interval)
+
+                response = http.post(
+                    token_url, data=poll_body, headers=poll_headers, timeout=30
+                )
+
+                if response.ok:
+                    token_response = orjson.loads(response.content)
 
                     # Create credentials object
                     credentials = Credentials(
@@ -189,23 +455,24 @@ class YouTubeUploader:
                     logger.info("✅ Manual device flow authentication successful!")
                     return credentials
 
-            except urllib.error.HTTPError as e:
                 try:
-                    error_response = json.loads(e.read().decode())
-                    error_code = error_response.get("error")
-
-                    if error_code == "authorization_pending":
-                        print(".", end="", flush=True)
-                        continue
-                    elif error_code == "slow_down":
-                        interval += 5
-                        continue
-                    elif error_code in ["expired_token", "access_denied"]:
-                        raise Exception(f"Authorization failed: {error_code}")
-                    else:
-                        raise Exception(f"Error: {error_response}")
-                except json.JSONDecodeError:
-                    raise Exception(f"HTTP Error: {e}")
+                    error_response = orjson.loads(response.content)
+                except orjson.JSONDecodeError:
+                    raise Exception(f"HTTP Error: {response.status_code} {response.reason}")
+
+                error_code = error_response.get("error")
+
+                if error_code == "authorization_pending":
+                    print(".", end="", flush=True)
+                    continue
+                elif error_code == "slow_down":
+                    # RFC 8628 3.5: add 5 seconds for this and all later polls
+                    interval += 5
+                    continue
+                elif error_code in ["expired_token", "access_denied"]:
+                    raise Exception(f"Authorization failed: {error_code}")
+                else:
+                    raise Exception(f"Error: {error_response}")
 
         raise Exception("Authentication timed out")
 
@@ -285,13 +552,6 @@ class YouTubeUploader:
 
         raise Exception("Maximum authentication attempts reached")
 
-    def _is_running_in_docker(self):
-        """Check if running inside Docker container."""
-        return (
-            os.path.exists("/.dockerenv")
-            or os.environ.get("DOCKER_CONTAINER") == "true"
-        )
-
     def _is_interactive(self):
         """Check if running in interactive mode."""
         try:
@@ -301,13 +561,21 @@ class YouTubeUploader:
         except:
             return False
 
-    async def download_video(self, video_url: str, output_path: str) -> str:
+    async def download_video(
+        self,
+        video_url: str,
+        output_path: str,
+        session: aiohttp.ClientSession | None = None,
+        chunk_size: int = 1 << 20,
+    ) -> str:
         """
         Download video from URL to local file.
 
         Args:
             video_url: URL of the video to download
             output_path: Local path to save the video
+            session: aiohttp session to use instead of the uploader's own
+            chunk_size: Size of the chunks read from the response
 
         Returns:
             Path to the downloaded file
@@ -315,36 +583,19 @@ class YouTubeUploader:
         try:
             logger.info(f"Downloading video from: {video_url}")
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(video_url) as response:
-                    response.raise_for_status()
-
-                    # Get content length for progress tracking
-                    content_length = response.headers.get("content-length")
-                    if content_length:
-                        total_size = int(content_length)
-                        logger.info(f"Video size: {total_size / (1024 * 1024):.2f} MB")
-
-                    # Download file
-                    async with aiofiles.open(output_path, "wb") as file:
-                        downloaded = 0
-                        async for chunk in response.content.iter_chunked(8192):
-                            await file.write(chunk)
-                            downloaded += len(chunk)
-
-                            if (
-                                content_length and downloaded % (1024 * 1024) == 0
-                            ):  # Log every MB
-                                progress = (downloaded / total_size) * 100
-                                logger.info(f"Download progress: {progress:.1f}%")
-
-            # Verify file was downloaded
-            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-                raise Exception(
-                    f"Downloaded file is empty or doesn't exist: {output_path}"
-                )
+            # Page-cache writes return quickly, so they run on the event loop
+            # rather than costing a thread hop per chunk
+            with open(output_path, "wb") as file:
+
+                async def write(chunk: bytes):
+                    file.write(chunk)
+
+                file_size = await self._download(video_url, session, chunk_size, write)
+
+            # Verify something was downloaded
+            if file_size == 0:
+                raise Exception(f"Downloaded file is empty: {output_path}")
 
-            file_size = os.path.getsize(output_path)
             logger.info(
                 f"Successfully downloaded video: {file_size / (1024 * 1024):.2f} MB"
             )
@@ -353,11 +604,65 @@ class YouTubeUploader:
 
         except Exception as e:
             logger.error(f"Failed to download video from {video_url}: {str(e)}")
-            # Clean up partial download
-            if os.path.exists(output_path):
-                os.remove(output_path)
+            # Clean up partial download, if one was created
+            with contextlib.suppress(FileNotFoundError):
+                await asyncio.to_thread(os.remove, output_path)
             raise
 
+    async def _download(
+        self,
+        video_url: str,
+        session: aiohttp.ClientSession | None,
+        chunk_size: int,
+        write: Callable[[bytes], Awaitable[Any]],
+    ) -> int:
+        """
+        Stream the response body to `write` chunk by chunk.
+
+        Returns:
+            Number of bytes downloaded
+        """
+        if session is None:
+            session = self._get_session()
+
+        async with session.get(video_url) as response:
+            response.raise_for_status()
+
+            # Verify the body against the CRC32C that Google Cloud Storage sends
+            expected_crc32c = _expected_crc32c(response.headers)
+            checksum = google_crc32c.Checksum() if expected_crc32c else None
+
+            # Get content length for progress tracking
+            content_length = response.headers.get("content-length")
+            if content_length:
+                total_size = int(content_length)
+                logger.info(f"Video size: {total_size / (1024 * 1024):.2f} MB")
+
+            downloaded = 0
+            last_logged = time.monotonic()
+            async for chunk in response.content.iter_chunked(chunk_size):
+                await write(chunk)
+                downloaded += len(chunk)
+                if checksum is not None:
+                    checksum.update(chunk)
+
+                now = time.monotonic()
+                if content_length and now - last_logged >= PROGRESS_LOG_INTERVAL:
+                    logger.debug(
+                        "Download progress: %.1f%%", downloaded * 100 / total_size
+                    )
+                    last_logged = now
+
+            if checksum is not None:
+                actual_crc32c = base64.b64encode(checksum.digest()).decode()
+                if actual_crc32c != expected_crc32c:
+                    raise Exception(
+                        f"Downloaded video is corrupt: CRC32C {actual_crc32c} "
+                        f"doesn't match {expected_crc32c}"
+                    )
+
+            return downloaded
+
     def upload_video(
         self,
         video_path: str,
@@ -381,6 +686,62 @@ class YouTubeUploader:
         Returns:
             Dictionary with upload result information
         """
+
+        def create_media():
+            # Small files skip the extra round trip of starting a resumable session
+            return MediaFileUpload(
+                video_path,
+                chunksize=self.upload_chunk_size,
+                resumable=os.path.getsize(video_path) > SIMPLE_UPLOAD_MAX_SIZE,
+            )
+
+        return self._upload_media(
+            create_media,
+            title,
+            description,
+            tags,
+            category_id,
+            privacy_status,
+        )
+
+    async def upload_video_async(
+        self,
+        video_path: str,
+        title: str,
+        description: str,
+        tags: List[str],
+        category_id: str = "22",
+        privacy_status: str = "public",
+    ) -> Dict[str, Any]:
+        """
+        Upload video to YouTube from an upload thread without blocking the event loop.
+
+        Takes the same arguments as upload_video.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            self.upload_video,
+            video_path,
+            title,
+            description,
+            tags,
+            category_id,
+            privacy_status,
+        )
+
+    def _upload_media(
+        self,
+        create_media: Callable[[], MediaUpload],
+        title: str,
+        description: str,
+        tags: List[str],
+        category_id: str,
+        privacy_status: str,
+    ) -> Dict[str, Any]:
+        """Insert a video with the media body returned by `create_media`."""
+        media = None
+
         try:
             logger.info(f"Starting YouTube upload for: {title}")
 
@@ -392,34 +753,35 @@ class YouTubeUploader:
                 "snippet": {
                     "title": title,
                     "description": description,
-                    "tags": tags,
+                    # Strip and de-duplicate tags, keeping their order
+                    "tags": list(dict.fromkeys(t.strip() for t in tags if t.strip())),
                     "categoryId": category_id,
                 },
                 "status": {"privacyStatus": privacy_status},
             }
 
             # Create media upload object
-            media = MediaFileUpload(
-                video_path,
-                chunksize=-1,  # Upload in a single request
-                resumable=True,
-            )
+            media = create_media()
 
-            # Execute upload
+            # Execute upload; the request is built once, outside the retry loop,
+            # so retries resume the same session with an identical body
             logger.info("Uploading video to YouTube...")
             insert_request = youtube.videos().insert(
-                part=",".join(body.keys()), body=body, media_body=media
+                part=VIDEO_INSERT_PARTS, body=body, media_body=media
             )
 
             # Execute the upload with retry logic
             response = None
             error = None
             retry = 0
-            max_retries = 3
+            max_retries = MAX_UPLOAD_RETRIES
 
             while response is None and retry < max_retries:
                 try:
-                    status, response = insert_request.next_chunk()
+                    if media.resumable():
+                        status, response = insert_request.next_chunk()
+                    else:
+                        status, response = None, insert_request.execute()
                     if response is not None:
                         if "id" in response:
                             video_id = response["id"]
@@ -443,11 +805,15 @@ class YouTubeUploader:
                             }
                     else:
                         if status:
-                            progress = int(status.progress() * 100)
-                            logger.info(f"Upload progress: {progress}%")
+                            # progress() is 0 while a streamed video's size is unknown
+                            logger.info(
+                                "Upload progress: %d%% (%.1f MB)",
+                                status.progress() * 100,
+                                status.resumable_progress / (1024 * 1024),
+                            )
 
                 except HttpError as e:
-                    if e.resp.status in [500, 502, 503, 504]:
+                    if e.resp.status in RETRIABLE_STATUS_CODES:
                         # Retriable error
                         retry += 1
                         logger.warning(
@@ -455,6 +821,7 @@ class YouTubeUploader:
                         )
                         if retry >= max_retries:
                             raise
+                        time.sleep(self._retry_delay(e, retry))
                     else:
                         # Non-retriable error
                         logger.error(f"Non-retriable HTTP error: {e}")
@@ -487,6 +854,23 @@ class YouTubeUploader:
         except Exception as e:
             logger.error(f"Unexpected error during YouTube upload: {e}")
             return {"success": False, "error": "upload_error", "message": str(e)}
+        finally:
+            if isinstance(media, _StreamingUpload):
+                media.close()
+
+    def _retry_delay(self, error: HttpError, retry: int) -> float:
+        """
+        Seconds to wait before a retry: the server's Retry-After, else jittered
+        backoff, never more than RETRY_BACKOFF_CAP either way.
+        """
+        retry_after = error.resp.get("retry-after")
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), RETRY_BACKOFF_CAP)
+            except ValueError:
+                pass  # HTTP-date form; fall back to backoff
+
+        return min(RETRY_BACKOFF_CAP, 2**retry * random.uniform(0.5, 1.5))
 
     async def upload_video_from_url(
         self,
@@ -496,10 +880,16 @@ class YouTubeUploader:
         tags: List[str],
         category_id: str = "22",
         privacy_status: str = "public",
+        chunk_size: int = 1 << 20,
+        session: aiohttp.ClientSession | None = None,
     ) -> Dict[str, Any]:
         """
         Download video from URL and upload to YouTube.
 
+        The upload runs in an upload thread and reads the download through a
+        bounded in-memory buffer, so both transfers overlap and nothing is
+        written to disk.
+
         Args:
             video_url: URL of the video to download
             title: Video title
@@ -507,39 +897,75 @@ class YouTubeUploader:
             tags: List of tags
             category_id: YouTube category ID
             privacy_status: Privacy status
+            chunk_size: Size of the chunks read from the download
+            session: aiohttp session to download with instead of the uploader's own
 
         Returns:
             Dictionary with upload result information
         """
-        temp_file = None
-
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
-                temp_file = tmp.name
-
-            # Download video
-            await self.download_video(video_url, temp_file)
+            logger.info(f"Downloading video from: {video_url}")
 
-            # Upload to YouTube
-            result = self.upload_video(
-                temp_file, title, description, tags, category_id, privacy_status
+            # Start downloading, then upload while the video arrives
+            buffer = _StreamBuffer(STREAMING_BUFFER_CHUNKS * self.upload_chunk_size)
+            download_task = asyncio.create_task(
+                self._stream_download(video_url, session, chunk_size, buffer)
             )
 
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._executor,
+                    self._upload_media,
+                    lambda: _StreamingUpload(buffer, self.upload_chunk_size),
+                    title,
+                    description,
+                    tags,
+                    category_id,
+                    privacy_status,
+                )
+            finally:
+                # Unblock the download if the upload stopped reading early
+                buffer.close()
+                if not download_task.done():
+                    # The upload ended early, so the rest of the video isn't needed
+                    download_task.cancel()
+                    with contextlib.suppress(asyncio.CancelledError):
+                        await download_task
+
+            # Report a failed download rather than the upload error it caused
+            if not download_task.cancelled():
+                download_task.result()
+
             return result
 
         except Exception as e:
             logger.error(f"Failed to upload video from URL: {e}")
             return {"success": False, "error": "processing_error", "message": str(e)}
 
-        finally:
-            # Clean up temporary file
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                    logger.info(f"Cleaned up temporary file: {temp_file}")
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary file: {e}")
+    async def _stream_download(
+        self,
+        video_url: str,
+        session: aiohttp.ClientSession | None,
+        chunk_size: int,
+        buffer: _StreamBuffer,
+    ):
+        """Download a video into the upload's buffer and signal completion or failure."""
+        try:
+            downloaded = await self._download(
+                video_url,
+                session,
+                chunk_size,
+                lambda chunk: asyncio.to_thread(buffer.put, chunk),
+            )
+            if downloaded == 0:
+                raise Exception("Downloaded video is empty")
+        except BaseException as e:
+            logger.error(f"Failed to download video from {video_url}: {str(e)}")
+            buffer.finish(e)
+            raise
+
+        logger.info(f"Successfully downloaded video: {downloaded / (1024 * 1024):.2f} MB")
+        buffer.finish()
 
     def get_video_info(self, video_id: str) -> Dict[str, Any]:
         """
@@ -556,7 +982,7 @@ class YouTubeUploader:
 
             response = (
                 youtube.videos()
-                .list(part="snippet,status,statistics", id=video_id)
+                .list(part=VIDEO_INFO_PARTS, id=video_id)
                 .execute()
             )
 